@@ -5,62 +5,280 @@ OpenBB 股票分析工具脚本
 """
 
 import argparse
+import asyncio
+import bisect
+import functools
+import hashlib
 import json
+import math
+import os
 import sys
-from datetime import datetime, timedelta
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
 from typing import Any, Optional
 
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时使用标准库 json
+    orjson = None
 
-def get_obb():
-    """延迟导入 OpenBB 以加快脚本启动"""
-    from openbb import obb
-    return obb
+
+_OBB = None
+
+# 历史数据磁盘缓存
+CACHE_DIR = Path(os.environ.get("STOCK_TOOL_CACHE_DIR", Path.home() / ".cache" / "stock_tool"))
+CACHE_TTL_INTRADAY = 3600
+CACHE_TTL_DAILY = 86400
 
 
-def find_indicator_key(data: dict, pattern: str) -> Optional[str]:
-    """查找包含指定模式的 key（OpenBB 返回的 key 可能有前缀如 close_RSI_14）"""
-    for key in data.keys():
-        if pattern in key:
-            return key
-    return None
+def get_obb():
+    """延迟导入 OpenBB 以加快脚本启动，导入后缓存复用"""
+    global _OBB
+    if _OBB is None:
+        from openbb import obb
+        _OBB = obb
+    return _OBB
+
+
+def _historical_cache_ttl(kwargs: dict) -> int:
+    """只有结束日期早于今天（不含当日行情）的日线级数据使用较长的缓存时间"""
+    interval = kwargs.get("interval") or "1d"
+    end_date = kwargs.get("end_date")
+    if interval[-1] in ("m", "h") or not end_date or str(end_date) >= date.today().isoformat():
+        return CACHE_TTL_INTRADAY
+    return CACHE_TTL_DAILY
+
+
+def to_records(result) -> list:
+    """将 OpenBB 结果转换为 records 列表"""
+    if hasattr(result, 'to_dict'):
+        return result.to_dict(orient="records")
+    return rows_to_records(result.results)
+
+
+def tail_records(result, n: int) -> list:
+    """只转换结果的最后 n 条，先截取再生成 records"""
+    if hasattr(result, "to_df"):
+        # 与 OBBject.to_dict 一致使用 index=None，date 保持为普通列
+        return result.to_df(index=None).tail(n).to_dict(orient="records")
+    if hasattr(result, 'to_dict'):
+        return result.to_dict(orient="records")[-n:]
+    return rows_to_records(result.results[-n:])
+
+
+def rows_to_records(rows: list) -> list:
+    """将结果行转换为 dict 列表"""
+    if not rows:
+        return []
+    # 按首行类型选定一次提取方式，避免逐行判断
+    first = rows[0]
+    if isinstance(first, dict):
+        return list(rows)
+    if hasattr(first, "model_dump"):
+        return [r.model_dump() for r in rows]
+    if hasattr(first, "dict"):
+        return [r.dict() for r in rows]
+    return [vars(r) for r in rows]
+
+
+@functools.lru_cache(maxsize=8)
+def default_start_date(today: date) -> str:
+    """技术分析默认起始日期（一年前），按日期缓存"""
+    return (today - timedelta(days=365)).isoformat()
+
+
+def _prune_historical_cache() -> None:
+    """删除超过最长缓存时间的历史数据缓存（默认起始日期每天变化，旧文件不会再被命中）"""
+    now = time.time()
+    for path in CACHE_DIR.glob("hist_*"):
+        try:
+            if now - path.stat().st_mtime >= CACHE_TTL_DAILY:
+                path.unlink()
+        except OSError:
+            pass
+
+
+def fetch_historical(obb, use_cache: bool = True, **kwargs) -> list:
+    """获取历史价格数据，按请求参数缓存到磁盘，返回 records 列表"""
+    key = json.dumps(kwargs, sort_keys=True)
+    path = CACHE_DIR / f"hist_{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+    if use_cache:
+        try:
+            if time.time() - path.stat().st_mtime < _historical_cache_ttl(kwargs):
+                with path.open(encoding="utf-8") as f:
+                    return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    result = obb.equity.price.historical(**kwargs)
+    if not result.results:
+        return []
+
+    # 统一为 JSON 可序列化形式，保证命中缓存与未命中时返回一致
+    text = json.dumps(to_records(result), default=str, ensure_ascii=False)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _prune_historical_cache()
+        # 先写临时文件再替换，避免并发读取到写了一半的缓存
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix="hist_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
+    return json.loads(text)
+
+
+def to_frame(records: list) -> Any:
+    """将历史数据转换为 DataFrame，供多个指标共享，避免每个指标重复转换"""
+    try:
+        import pandas as pd
+    except ImportError:
+        return records
+    df = pd.DataFrame.from_records(records)
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"])
+    return df
 
 
 def get_indicator_value(data: dict, pattern: str) -> Optional[float]:
-    """获取指标值"""
-    key = find_indicator_key(data, pattern)
-    return data.get(key) if key else None
+    """获取指标值（OpenBB 返回的 key 可能有前缀如 close_RSI_14），单次遍历直接取值"""
+    return next((data[key] for key in data if pattern in key), None)
+
+
+# 日期时间交给 default=str 处理，与标准库 json 回退路径输出一致
+_ORJSON_OPTIONS = (
+    orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+) if orjson else 0
+
+
+def _nan_to_none(data: Any) -> Any:
+    """将 NaN/Infinity 替换为 None，使标准库 json 与 orjson 一样输出 null"""
+    if isinstance(data, float):
+        return None if math.isnan(data) or math.isinf(data) else data
+    if isinstance(data, dict):
+        return {key: _nan_to_none(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_nan_to_none(value) for value in data]
+    return data
+
+
+def dumps_json(data: Any) -> str:
+    """序列化为缩进 JSON，安装了 orjson 时使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(data, default=str, option=_ORJSON_OPTIONS).decode("utf-8")
+    return json.dumps(_nan_to_none(data), indent=2, default=str, ensure_ascii=False, allow_nan=False)
 
 
 def format_output(data: Any, fmt: str = "json") -> str:
     """格式化输出数据"""
     if fmt == "json":
-        return json.dumps(data, indent=2, default=str, ensure_ascii=False)
+        return dumps_json(data)
     elif fmt == "table":
         if isinstance(data, list) and data:
-            headers = list(data[0].keys())
+            # 表头取所有行 key 的并集，批量结果中的错误行与正常行字段不同
+            headers = list(dict.fromkeys(key for row in data for key in row))
             rows = [[str(row.get(h, "")) for h in headers] for row in data]
-            col_widths = [max(len(h), max((len(r[i]) for r in rows), default=0)) for i, h in enumerate(headers)]
-            header_line = " | ".join(h.ljust(col_widths[i]) for i, h in enumerate(headers))
+            col_widths = [max(len(h), *map(len, col)) for h, col in zip(headers, zip(*rows))]
+            line_fmt = " | ".join(f"{{:<{w}}}" for w in col_widths)
             separator = "-+-".join("-" * w for w in col_widths)
-            data_lines = [" | ".join(r[i].ljust(col_widths[i]) for i in range(len(headers))) for r in rows]
-            return "\n".join([header_line, separator] + data_lines)
+            return "\n".join([line_fmt.format(*headers), separator] + [line_fmt.format(*r) for r in rows])
         return str(data)
     return str(data)
 
 
+def emit_json(data: Any, fp=None, indent: bool = True) -> None:
+    """输出 JSON 并换行；orjson 可用时直接写入底层字节流，否则用 json.dump 流式写入"""
+    if fp is None:
+        fp = sys.stdout
+    if orjson is not None:
+        option = _ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE
+        if not indent:
+            option &= ~orjson.OPT_INDENT_2
+        payload = orjson.dumps(data, default=str, option=option)
+        buffer = getattr(fp, "buffer", None)
+        if buffer is not None:
+            fp.flush()
+            buffer.write(payload)
+            buffer.flush()
+        else:
+            fp.write(payload.decode("utf-8"))
+    elif indent:
+        json.dump(_nan_to_none(data), fp, indent=2, default=str, ensure_ascii=False, allow_nan=False)
+        fp.write("\n")
+    else:
+        fp.write(json.dumps(_nan_to_none(data), default=str, ensure_ascii=False, allow_nan=False) + "\n")
+
+
+def write_output(data: Any, fmt: str = "json", fp=None) -> None:
+    """输出数据"""
+    if fmt == "json":
+        emit_json(data, fp)
+        return
+    if fp is None:
+        fp = sys.stdout
+    fp.write(format_output(data, fmt))
+    fp.write("\n")
+
+
+def split_symbols(symbol: str) -> list:
+    """拆分逗号分隔的多个股票代码"""
+    return [sym.strip() for sym in symbol.split(",") if sym.strip()]
+
+
+async def _fanout(fn, symbols: list, max_concurrency: int, **kwargs) -> list:
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(symbol):
+        async with semaphore:
+            return await asyncio.to_thread(fn, symbol=symbol, **kwargs)
+
+    return await asyncio.gather(*(fetch(sym) for sym in symbols), return_exceptions=True)
+
+
+def fetch_many(fn, symbols: list, max_concurrency: int = 10, **kwargs) -> list:
+    """并发请求多个股票代码并合并结果，单个代码失败时记录错误；kwargs 原样传给 fn"""
+    data = []
+    for symbol, result in zip(symbols, asyncio.run(_fanout(fn, symbols, max_concurrency, **kwargs))):
+        if isinstance(result, Exception):
+            data.append({"error": str(result), "symbol": symbol})
+        elif result.results:
+            data.extend(to_records(result))
+        else:
+            data.append({"error": "No data returned", "symbol": symbol})
+    return data
+
+
 def cmd_quote(args):
     """获取股票实时报价"""
     obb = get_obb()
     try:
-        result = obb.equity.price.quote(args.symbol, provider=args.provider)
+        symbols = split_symbols(args.symbol)
+        if len(symbols) > 1:
+            data = fetch_many(obb.equity.price.quote, symbols, provider=args.provider)
+            if any("error" not in row for row in data):
+                write_output(data, args.format)
+                return
+            emit_json({"error": "No data returned", "symbol": args.symbol, "details": data}, indent=False)
+            sys.exit(1)
+
+        symbol = symbols[0] if symbols else args.symbol
+        result = obb.equity.price.quote(symbol, provider=args.provider)
         if result.results:
-            data = result.to_dict(orient="records") if hasattr(result, 'to_dict') else [vars(r) for r in result.results]
-            print(format_output(data, args.format))
+            write_output(to_records(result), args.format)
         else:
-            print(json.dumps({"error": "No data returned", "symbol": args.symbol}))
+            emit_json({"error": "No data returned", "symbol": args.symbol}, indent=False)
             sys.exit(1)
     except Exception as e:
-        print(json.dumps({"error": str(e), "symbol": args.symbol}))
+        emit_json({"error": str(e), "symbol": args.symbol}, indent=False)
         sys.exit(1)
 
 
@@ -79,15 +297,14 @@ def cmd_history(args):
         if args.interval:
             kwargs["interval"] = args.interval
 
-        result = obb.equity.price.historical(**kwargs)
-        if result.results:
-            data = result.to_dict(orient="records") if hasattr(result, 'to_dict') else [vars(r) for r in result.results]
-            print(format_output(data, args.format))
+        data = fetch_historical(obb, use_cache=not getattr(args, "no_cache", False), **kwargs)
+        if data:
+            write_output(data, args.format)
         else:
-            print(json.dumps({"error": "No data returned", "symbol": args.symbol}))
+            emit_json({"error": "No data returned", "symbol": args.symbol}, indent=False)
             sys.exit(1)
     except Exception as e:
-        print(json.dumps({"error": str(e), "symbol": args.symbol}))
+        emit_json({"error": str(e), "symbol": args.symbol}, indent=False)
         sys.exit(1)
 
 
@@ -95,8 +312,9 @@ def cmd_news(args):
     """获取股票相关新闻"""
     obb = get_obb()
     try:
+        symbols = split_symbols(args.symbol)
         kwargs = {
-            "symbol": args.symbol,
+            "symbol": symbols[0] if symbols else args.symbol,
             "provider": args.provider,
         }
         if args.limit:
@@ -106,18 +324,99 @@ def cmd_news(args):
         if args.end:
             kwargs["end_date"] = args.end
 
+        if len(symbols) > 1:
+            # limit 按单个股票代码生效，合并结果最多 len(symbols) * limit 条
+            del kwargs["symbol"]
+            data = fetch_many(obb.news.company, symbols, **kwargs)
+            if any("error" not in row for row in data):
+                write_output(data, args.format)
+                return
+            emit_json({"error": "No news found", "symbol": args.symbol, "details": data}, indent=False)
+            sys.exit(1)
+
         result = obb.news.company(**kwargs)
         if result.results:
-            data = result.to_dict(orient="records") if hasattr(result, 'to_dict') else [vars(r) for r in result.results]
-            print(format_output(data, args.format))
+            write_output(to_records(result), args.format)
         else:
-            print(json.dumps({"error": "No news found", "symbol": args.symbol}))
+            emit_json({"error": "No news found", "symbol": args.symbol}, indent=False)
             sys.exit(1)
     except Exception as e:
-        print(json.dumps({"error": str(e), "symbol": args.symbol}))
+        emit_json({"error": str(e), "symbol": args.symbol}, indent=False)
         sys.exit(1)
 
 
+# 技术指标表：fields 为输出字段 -> 指标列名模式，with_period 表示输出中附带周期
+INDICATORS = {
+    "rsi": {
+        "fn": lambda obb, data, period: obb.technical.rsi(data=data, length=period),
+        "fields": {"latest": "RSI_{period}"},
+        "with_period": True,
+        "interpret": lambda v: interpret_rsi(v["latest"]),
+    },
+    "macd": {
+        "fn": lambda obb, data, period: obb.technical.macd(data=data),
+        "fields": {
+            "latest_macd": "MACD_12_26_9",
+            "latest_signal": "MACDs_12_26_9",
+            "latest_histogram": "MACDh_12_26_9",
+        },
+        "interpret": lambda v: interpret_macd({
+            "macd": v["latest_macd"], "signal": v["latest_signal"], "histogram": v["latest_histogram"]
+        }),
+    },
+    "sma": {
+        "fn": lambda obb, data, period: obb.technical.sma(data=data, length=period),
+        "fields": {"latest": "SMA_{period}"},
+        "with_period": True,
+    },
+    "ema": {
+        "fn": lambda obb, data, period: obb.technical.ema(data=data, length=period),
+        "fields": {"latest": "EMA_{period}"},
+        "with_period": True,
+    },
+    "bbands": {
+        "fn": lambda obb, data, period: obb.technical.bbands(data=data, length=period),
+        "fields": {"upper": "BBU_{period}", "middle": "BBM_{period}", "lower": "BBL_{period}"},
+        "with_period": True,
+    },
+    "adx": {
+        "fn": lambda obb, data, period: obb.technical.adx(data=data, length=period),
+        "fields": {"latest": "ADX_{period}"},
+        "with_period": True,
+        "interpret": lambda v: interpret_adx(v["latest"]),
+    },
+    "stoch": {
+        "fn": lambda obb, data, period: obb.technical.stoch(data=data),
+        "fields": {"k": "STOCHk_14_3_3", "d": "STOCHd_14_3_3"},
+        "interpret": lambda v: interpret_stoch({"k": v["k"], "d": v["d"]}),
+    },
+}
+
+
+def compute_indicator(obb, indicator: str, data: Any, period: int) -> Optional[dict]:
+    """计算单个技术指标，无结果时返回 None"""
+    spec = INDICATORS.get(indicator)
+    if spec is None:
+        return {"error": f"Unsupported indicator: {indicator}"}
+
+    ind_result = spec["fn"](obb, data, period)
+    if not ind_result.results:
+        return None
+
+    recent = tail_records(ind_result, 10)  # 最近10条
+    latest = recent[-1] if recent else {}
+    output = {
+        name: get_indicator_value(latest, pattern.format(period=period))
+        for name, pattern in spec["fields"].items()
+    }
+    if spec.get("with_period"):
+        output["period"] = period
+    output["recent_data"] = recent
+    if "interpret" in spec:
+        output["interpretation"] = spec["interpret"](output)
+    return output
+
+
 def cmd_technical(args):
     """技术分析指标计算"""
     obb = get_obb()
@@ -131,136 +430,69 @@ def cmd_technical(args):
             hist_kwargs["start_date"] = args.start
         else:
             # 默认获取过去一年数据用于技术分析
-            hist_kwargs["start_date"] = (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d")
+            hist_kwargs["start_date"] = default_start_date(date.today())
 
-        history = obb.equity.price.historical(**hist_kwargs)
-        if not history.results:
-            print(json.dumps({"error": "No historical data for technical analysis", "symbol": args.symbol}))
+        history = fetch_historical(obb, use_cache=not getattr(args, "no_cache", False), **hist_kwargs)
+        if not history:
+            emit_json({"error": "No historical data for technical analysis", "symbol": args.symbol}, indent=False)
             sys.exit(1)
 
-        indicators = [ind.strip().lower() for ind in args.indicators.split(",")]
+        hist_df = to_frame(history)
+        indicators = list(dict.fromkeys(ind.strip().lower() for ind in args.indicators.split(",")))
         results = {"symbol": args.symbol, "indicators": {}}
 
-        for indicator in indicators:
-            try:
-                if indicator == "rsi":
-                    ind_result = obb.technical.rsi(data=history.results, length=args.period)
-                    if ind_result.results:
-                        data = ind_result.to_dict(orient="records")[-10:]  # 最近10条
-                        latest = data[-1] if data else {}
-                        rsi_val = get_indicator_value(latest, f"RSI_{args.period}")
-                        results["indicators"]["rsi"] = {
-                            "latest": rsi_val,
-                            "period": args.period,
-                            "recent_data": data,
-                            "interpretation": interpret_rsi(rsi_val)
-                        }
-
-                elif indicator == "macd":
-                    ind_result = obb.technical.macd(data=history.results)
-                    if ind_result.results:
-                        data = ind_result.to_dict(orient="records")[-10:]
-                        latest = data[-1] if data else {}
-                        macd_val = get_indicator_value(latest, "MACD_12_26_9")
-                        signal_val = get_indicator_value(latest, "MACDs_12_26_9")
-                        hist_val = get_indicator_value(latest, "MACDh_12_26_9")
-                        results["indicators"]["macd"] = {
-                            "latest_macd": macd_val,
-                            "latest_signal": signal_val,
-                            "latest_histogram": hist_val,
-                            "recent_data": data,
-                            "interpretation": interpret_macd({"macd": macd_val, "signal": signal_val, "histogram": hist_val})
-                        }
-
-                elif indicator == "sma":
-                    ind_result = obb.technical.sma(data=history.results, length=args.period)
-                    if ind_result.results:
-                        data = ind_result.to_dict(orient="records")[-10:]
-                        latest = data[-1] if data else {}
-                        sma_val = get_indicator_value(latest, f"SMA_{args.period}")
-                        results["indicators"]["sma"] = {
-                            "latest": sma_val,
-                            "period": args.period,
-                            "recent_data": data
-                        }
-
-                elif indicator == "ema":
-                    ind_result = obb.technical.ema(data=history.results, length=args.period)
-                    if ind_result.results:
-                        data = ind_result.to_dict(orient="records")[-10:]
-                        latest = data[-1] if data else {}
-                        ema_val = get_indicator_value(latest, f"EMA_{args.period}")
-                        results["indicators"]["ema"] = {
-                            "latest": ema_val,
-                            "period": args.period,
-                            "recent_data": data
-                        }
-
-                elif indicator == "bbands":
-                    ind_result = obb.technical.bbands(data=history.results, length=args.period)
-                    if ind_result.results:
-                        data = ind_result.to_dict(orient="records")[-10:]
-                        latest = data[-1] if data else {}
-                        results["indicators"]["bbands"] = {
-                            "upper": get_indicator_value(latest, f"BBU_{args.period}"),
-                            "middle": get_indicator_value(latest, f"BBM_{args.period}"),
-                            "lower": get_indicator_value(latest, f"BBL_{args.period}"),
-                            "period": args.period,
-                            "recent_data": data
-                        }
-
-                elif indicator == "adx":
-                    ind_result = obb.technical.adx(data=history.results, length=args.period)
-                    if ind_result.results:
-                        data = ind_result.to_dict(orient="records")[-10:]
-                        latest = data[-1] if data else {}
-                        adx_val = get_indicator_value(latest, f"ADX_{args.period}")
-                        results["indicators"]["adx"] = {
-                            "latest": adx_val,
-                            "period": args.period,
-                            "recent_data": data,
-                            "interpretation": interpret_adx(adx_val)
-                        }
-
-                elif indicator == "stoch":
-                    ind_result = obb.technical.stoch(data=history.results)
-                    if ind_result.results:
-                        data = ind_result.to_dict(orient="records")[-10:]
-                        latest = data[-1] if data else {}
-                        k_val = get_indicator_value(latest, "STOCHk_14_3_3")
-                        d_val = get_indicator_value(latest, "STOCHd_14_3_3")
-                        results["indicators"]["stoch"] = {
-                            "k": k_val,
-                            "d": d_val,
-                            "recent_data": data,
-                            "interpretation": interpret_stoch({"k": k_val, "d": d_val})
-                        }
-
-                else:
-                    results["indicators"][indicator] = {"error": f"Unsupported indicator: {indicator}"}
-
-            except Exception as e:
-                results["indicators"][indicator] = {"error": str(e)}
-
-        print(format_output(results, args.format))
+        # 各指标互不依赖，并发计算，结果按请求顺序写回
+        with ThreadPoolExecutor(max_workers=len(indicators)) as executor:
+            futures = {
+                indicator: executor.submit(compute_indicator, obb, indicator, hist_df, args.period)
+                for indicator in indicators
+            }
+            for indicator, future in futures.items():
+                try:
+                    ind_data = future.result()
+                    if ind_data is not None:
+                        results["indicators"][indicator] = ind_data
+                except Exception as e:
+                    results["indicators"][indicator] = {"error": str(e)}
+
+        write_output(results, args.format)
 
     except Exception as e:
-        print(json.dumps({"error": str(e), "symbol": args.symbol}))
+        emit_json({"error": str(e), "symbol": args.symbol}, indent=False)
         sys.exit(1)
 
 
+# 指标解读分档表：bisect_right 命中区间下标即为对应解读
+# "<= 30" 这类闭区间上界用 nextafter 转换为 bisect_right 的开区间阈值
+_RSI_THRESHOLDS = (math.nextafter(30, math.inf), 50, 70)
+_RSI_LABELS = (
+    "超卖区域，可能存在反弹机会",
+    "偏弱势，空头占优",
+    "偏强势，多头占优",
+    "超买区域，可能面临回调压力",
+)
+_ADX_THRESHOLDS = (25,)
+_ADX_LABELS = (
+    "趋势不明显，市场可能处于震荡",
+    "趋势明显，适合趋势跟踪策略",
+)
+_STOCH_THRESHOLDS = (math.nextafter(20, math.inf), 80)
+_STOCH_ZONE_LABELS = {
+    0: "超卖区域，可能存在反弹机会",
+    2: "超买区域，注意回调风险",
+}
+
+
+def _is_missing(value: Optional[float]) -> bool:
+    """指标值缺失：None 或 NaN（历史数据短于周期时最新值为 NaN）"""
+    return value is None or math.isnan(value)
+
+
 def interpret_rsi(value: Optional[float]) -> str:
     """解读 RSI 指标"""
-    if value is None:
+    if _is_missing(value):
         return "无法计算"
-    if value >= 70:
-        return "超买区域，可能面临回调压力"
-    elif value <= 30:
-        return "超卖区域，可能存在反弹机会"
-    elif value >= 50:
-        return "偏强势，多头占优"
-    else:
-        return "偏弱势，空头占优"
+    return _RSI_LABELS[bisect.bisect_right(_RSI_THRESHOLDS, value)]
 
 
 def interpret_macd(data: dict) -> str:
@@ -269,10 +501,10 @@ def interpret_macd(data: dict) -> str:
     signal = data.get("signal")
     histogram = data.get("histogram")
 
-    if macd is None or signal is None:
+    if _is_missing(macd) or _is_missing(signal):
         return "无法计算"
 
-    if histogram is None:
+    if _is_missing(histogram):
         histogram = macd - signal
 
     if macd > signal and histogram > 0:
@@ -287,12 +519,9 @@ def interpret_macd(data: dict) -> str:
 
 def interpret_adx(value: Optional[float]) -> str:
     """解读 ADX 指标"""
-    if value is None:
+    if _is_missing(value):
         return "无法计算"
-    if value >= 25:
-        return "趋势明显，适合趋势跟踪策略"
-    else:
-        return "趋势不明显，市场可能处于震荡"
+    return _ADX_LABELS[bisect.bisect_right(_ADX_THRESHOLDS, value)]
 
 
 def interpret_stoch(data: dict) -> str:
@@ -300,44 +529,29 @@ def interpret_stoch(data: dict) -> str:
     k = data.get("k")
     d = data.get("d")
 
-    if k is None or d is None:
+    if _is_missing(k) or _is_missing(d):
         return "无法计算"
 
-    if k >= 80 and d >= 80:
-        return "超买区域，注意回调风险"
-    elif k <= 20 and d <= 20:
-        return "超卖区域，可能存在反弹机会"
+    # K、D 同处超买/超卖区间时按区间解读，否则看交叉方向
+    zone = bisect.bisect_right(_STOCH_THRESHOLDS, k)
+    if zone in _STOCH_ZONE_LABELS and zone == bisect.bisect_right(_STOCH_THRESHOLDS, d):
+        return _STOCH_ZONE_LABELS[zone]
     elif k > d:
         return "K线上穿D线，短期偏多"
     else:
         return "K线下穿D线，短期偏空"
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="OpenBB 股票分析工具 - 供 Claude Code/Codex 使用",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-示例:
-  python stock_tool.py quote AAPL
-  python stock_tool.py history AAPL --start 2024-01-01 --end 2024-12-31
-  python stock_tool.py news AAPL --limit 10
-  python stock_tool.py technical AAPL --indicators rsi,macd,sma --period 14
-        """
-    )
-    parser.add_argument("--format", "-f", choices=["json", "table"], default="json",
-                        help="输出格式 (默认: json)")
-
-    subparsers = parser.add_subparsers(dest="command", help="可用命令")
-
-    # quote 子命令
+def add_quote_parser(subparsers):
+    """quote 子命令"""
     quote_parser = subparsers.add_parser("quote", help="获取股票实时报价")
-    quote_parser.add_argument("symbol", help="股票代码")
+    quote_parser.add_argument("symbol", help="股票代码，多个用逗号分隔")
     quote_parser.add_argument("--provider", "-p", default="yfinance",
                               help="数据提供商 (默认: yfinance)")
-    quote_parser.set_defaults(func=cmd_quote)
 
-    # history 子命令
+
+def add_history_parser(subparsers):
+    """history 子命令"""
     history_parser = subparsers.add_parser("history", help="获取历史价格数据")
     history_parser.add_argument("symbol", help="股票代码")
     history_parser.add_argument("--start", "-s", help="开始日期 (YYYY-MM-DD)")
@@ -346,20 +560,24 @@ def main():
                                 help="时间间隔 (1m, 5m, 15m, 30m, 1h, 1d, 1wk, 1mo)")
     history_parser.add_argument("--provider", "-p", default="yfinance",
                                 help="数据提供商 (默认: yfinance)")
-    history_parser.set_defaults(func=cmd_history)
+    history_parser.add_argument("--no-cache", action="store_true",
+                                help="忽略本地缓存，重新获取数据")
+
 
-    # news 子命令
+def add_news_parser(subparsers):
+    """news 子命令"""
     news_parser = subparsers.add_parser("news", help="获取股票相关新闻")
-    news_parser.add_argument("symbol", help="股票代码")
+    news_parser.add_argument("symbol", help="股票代码，多个用逗号分隔")
     news_parser.add_argument("--limit", "-l", type=int, default=10,
-                             help="返回新闻数量 (默认: 10)")
+                             help="每个股票代码返回的新闻数量 (默认: 10)")
     news_parser.add_argument("--start", "-s", help="开始日期 (YYYY-MM-DD)")
     news_parser.add_argument("--end", "-e", help="结束日期 (YYYY-MM-DD)")
     news_parser.add_argument("--provider", "-p", default="yfinance",
                              help="数据提供商 (默认: yfinance)")
-    news_parser.set_defaults(func=cmd_news)
 
-    # technical 子命令
+
+def add_technical_parser(subparsers):
+    """technical 子命令"""
     tech_parser = subparsers.add_parser("technical", help="技术分析指标")
     tech_parser.add_argument("symbol", help="股票代码")
     tech_parser.add_argument("--indicators", "-i", default="rsi,macd,sma",
@@ -369,15 +587,67 @@ def main():
     tech_parser.add_argument("--start", "-s", help="历史数据开始日期 (YYYY-MM-DD)")
     tech_parser.add_argument("--provider", "-p", default="yfinance",
                              help="数据提供商 (默认: yfinance)")
-    tech_parser.set_defaults(func=cmd_technical)
+    tech_parser.add_argument("--no-cache", action="store_true",
+                             help="忽略本地缓存，重新获取数据")
+
+
+SUBCOMMANDS = {
+    "quote": add_quote_parser,
+    "history": add_history_parser,
+    "news": add_news_parser,
+    "technical": add_technical_parser,
+}
+
+DISPATCH = {
+    "quote": cmd_quote,
+    "history": cmd_history,
+    "news": cmd_news,
+    "technical": cmd_technical,
+}
+
+
+def build_parser(commands=SUBCOMMANDS) -> argparse.ArgumentParser:
+    """构建命令行解析器，只注册 commands 中的子命令"""
+    parser = argparse.ArgumentParser(
+        description="OpenBB 股票分析工具 - 供 Claude Code/Codex 使用",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  python stock_tool.py quote AAPL
+  python stock_tool.py history AAPL --start 2024-01-01 --end 2024-12-31
+  python stock_tool.py news AAPL --limit 10
+  python stock_tool.py technical AAPL --indicators rsi,macd,sma --period 14
+        """
+    )
+    parser.add_argument("--format", "-f", choices=["json", "table"], default="json",
+                        help="输出格式 (默认: json)")
+
+    subparsers = parser.add_subparsers(dest="command", help="可用命令")
+    for name in commands:
+        SUBCOMMANDS[name](subparsers)
+    return parser
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # 只构建实际调用的子命令；请求帮助或未识别子命令时构建全部以输出完整提示
+    command = next((arg for arg in argv if arg in SUBCOMMANDS), None)
+    top_level = argv[:argv.index(command)] if command else argv
+    if command is None or "-h" in top_level or "--help" in top_level:
+        parser = build_parser()
+    else:
+        parser = build_parser([command])
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
-    if args.command is None:
+    fn = DISPATCH.get(args.command)
+    if fn is None:
         parser.print_help()
         sys.exit(1)
 
-    args.func(args)
+    fn(args)
 
 
 if __name__ == "__main__":
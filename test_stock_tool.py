@@ -4,25 +4,79 @@ OpenBB 股票分析工具单元测试
 使用 mock 模拟 OpenBB API 响应
 """
 
+import argparse
+import io
 import json
+import os
 import sys
+import tempfile
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta
 from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+import stock_tool
+from stock_tool import (
+    cmd_history, cmd_news, cmd_quote, cmd_technical, emit_json, format_output,
+    get_indicator_value, interpret_adx, interpret_macd, interpret_rsi, interpret_stoch, main,
+    tail_records, to_records, write_output,
+)
+
 
 class MockOBBResult:
-    """模拟 OpenBB 返回结果"""
+    """模拟 OpenBB 返回结果，构造时按数据类型选择实现，to_dict 不再逐次判断"""
+    def __new__(cls, data):
+        if cls is MockOBBResult and not isinstance(data, list):
+            cls = MockOBBSingleResult
+        return super().__new__(cls)
+
     def __init__(self, data):
         self.results = data
 
+    def to_dict(self, orient="records"):
+        return self.results
+
+
+class MockOBBSingleResult(MockOBBResult):
+    """模拟只有单条记录的 OpenBB 返回结果"""
     def to_dict(self, orient="records"):
         if orient == "records":
-            return self.results if isinstance(self.results, list) else [self.results]
+            return [self.results]
         return self.results
 
 
+class MockOBBFrameResult:
+    """模拟由 DataFrame 支撑的 OpenBB 返回结果，to_dict 与 OBBject 一样基于 to_df(index=None)"""
+    def __init__(self, data):
+        self.results = data
+
+    def to_df(self, index="date"):
+        df = pd.DataFrame.from_records(self.results)
+        if index is not None and index in df.columns:
+            df = df.set_index(index)
+        return df
+
+    def to_dict(self, orient="records"):
+        return self.to_df(index=None).to_dict(orient=orient)
+
+
+class CacheIsolatedTestCase(unittest.TestCase):
+    """每个测试使用独立的历史数据缓存目录"""
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = patch('stock_tool.CACHE_DIR', Path(tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
 class TestQuote(unittest.TestCase):
     """报价功能测试"""
 
@@ -44,8 +98,6 @@ class TestQuote(unittest.TestCase):
         }]
         mock_obb.equity.price.quote.return_value = MockOBBResult(mock_quote_data)
 
-        from stock_tool import cmd_quote
-        import argparse
         args = argparse.Namespace(symbol="AAPL", provider="yfinance", format="json")
 
         captured_output = StringIO()
@@ -65,8 +117,6 @@ class TestQuote(unittest.TestCase):
         mock_get_obb.return_value = mock_obb
         mock_obb.equity.price.quote.return_value = MockOBBResult([])
 
-        from stock_tool import cmd_quote
-        import argparse
         args = argparse.Namespace(symbol="INVALID123", provider="yfinance", format="json")
 
         captured_output = StringIO()
@@ -77,8 +127,63 @@ class TestQuote(unittest.TestCase):
 
         self.assertEqual(context.exception.code, 1)
 
+    @patch('stock_tool.get_obb')
+    def test_quote_multiple_symbols(self, mock_get_obb):
+        """测试多个股票代码并发报价"""
+        mock_obb = MagicMock()
+        mock_get_obb.return_value = mock_obb
+
+        def quote(symbol, provider):
+            if symbol == "BAD":
+                raise ValueError("invalid symbol")
+            if symbol == "EMPTY":
+                return MockOBBResult([])
+            return MockOBBResult([{"symbol": symbol, "price": 100.0}])
+        mock_obb.equity.price.quote.side_effect = quote
+
+        args = argparse.Namespace(symbol="AAPL, MSFT,BAD,EMPTY", provider="yfinance", format="json")
+
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        cmd_quote(args)
+        sys.stdout = sys.__stdout__
+
+        output = json.loads(captured_output.getvalue())
+        self.assertEqual([row["symbol"] for row in output], ["AAPL", "MSFT", "BAD", "EMPTY"])
+        self.assertEqual(output[2]["error"], "invalid symbol")
+        self.assertEqual(output[3]["error"], "No data returned")
+        self.assertEqual(mock_obb.equity.price.quote.call_count, 4)
+
+        # 表格格式下错误行不影响正常行的字段
+        args.format = "table"
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        cmd_quote(args)
+        sys.stdout = sys.__stdout__
+
+        table = captured_output.getvalue()
+        self.assertIn("price", table.splitlines()[0])
+        self.assertIn("error", table.splitlines()[0])
+        self.assertIn("100.0", table)
+
+    @patch('stock_tool.get_obb')
+    def test_quote_trailing_comma(self, mock_get_obb):
+        """测试单个代码带多余逗号时只传入代码本身"""
+        mock_obb = MagicMock()
+        mock_get_obb.return_value = mock_obb
+        mock_obb.equity.price.quote.return_value = MockOBBResult([{"symbol": "AAPL", "price": 185.5}])
+
+        args = argparse.Namespace(symbol="AAPL,", provider="yfinance", format="json")
 
-class TestHistory(unittest.TestCase):
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        cmd_quote(args)
+        sys.stdout = sys.__stdout__
+
+        mock_obb.equity.price.quote.assert_called_once_with("AAPL", provider="yfinance")
+
+
+class TestHistory(CacheIsolatedTestCase):
     """历史数据测试"""
 
     @patch('stock_tool.get_obb')
@@ -93,8 +198,6 @@ class TestHistory(unittest.TestCase):
         ]
         mock_obb.equity.price.historical.return_value = MockOBBResult(mock_history_data)
 
-        from stock_tool import cmd_history
-        import argparse
         args = argparse.Namespace(
             symbol="AAPL", provider="yfinance", format="json",
             start="2024-01-01", end="2024-01-31", interval="1d"
@@ -121,8 +224,6 @@ class TestHistory(unittest.TestCase):
         ]
         mock_obb.equity.price.historical.return_value = MockOBBResult(mock_history_data)
 
-        from stock_tool import cmd_history
-        import argparse
         args = argparse.Namespace(
             symbol="AAPL", provider="yfinance", format="json",
             start="2024-01-02", end="2024-01-02", interval="1h"
@@ -137,6 +238,82 @@ class TestHistory(unittest.TestCase):
         self.assertIsInstance(output, list)
         mock_obb.equity.price.historical.assert_called_once()
 
+    @patch('stock_tool.get_obb')
+    def test_history_cache(self, mock_get_obb):
+        """测试重复请求命中磁盘缓存"""
+        mock_obb = MagicMock()
+        mock_get_obb.return_value = mock_obb
+
+        mock_history_data = [
+            {"date": "2024-01-02", "open": 180.0, "high": 182.0, "low": 179.0, "close": 181.5, "volume": 40000000},
+        ]
+        mock_obb.equity.price.historical.return_value = MockOBBResult(mock_history_data)
+
+        args = argparse.Namespace(
+            symbol="AAPL", provider="yfinance", format="json",
+            start="2024-01-01", end="2024-01-31", interval="1d"
+        )
+
+        outputs = []
+        for _ in range(2):
+            captured_output = StringIO()
+            sys.stdout = captured_output
+            cmd_history(args)
+            sys.stdout = sys.__stdout__
+            outputs.append(json.loads(captured_output.getvalue()))
+
+        self.assertEqual(outputs[0], outputs[1])
+        mock_obb.equity.price.historical.assert_called_once()
+
+        # --no-cache 时重新请求
+        args.no_cache = True
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        cmd_history(args)
+        sys.stdout = sys.__stdout__
+        self.assertEqual(mock_obb.equity.price.historical.call_count, 2)
+
+    def test_history_cache_ttl(self):
+        """测试结束日期为今天或之后时使用较短的缓存时间"""
+        today = datetime.now().date()
+        past = (today - timedelta(days=1)).isoformat()
+        future = (today + timedelta(days=1)).isoformat()
+
+        self.assertEqual(stock_tool._historical_cache_ttl({"end_date": past}), stock_tool.CACHE_TTL_DAILY)
+        self.assertEqual(stock_tool._historical_cache_ttl({"end_date": today.isoformat()}), stock_tool.CACHE_TTL_INTRADAY)
+        self.assertEqual(stock_tool._historical_cache_ttl({"end_date": future}), stock_tool.CACHE_TTL_INTRADAY)
+        self.assertEqual(stock_tool._historical_cache_ttl({"end_date": "2099-01-01"}), stock_tool.CACHE_TTL_INTRADAY)
+        self.assertEqual(stock_tool._historical_cache_ttl({}), stock_tool.CACHE_TTL_INTRADAY)
+        self.assertEqual(
+            stock_tool._historical_cache_ttl({"end_date": past, "interval": "1h"}), stock_tool.CACHE_TTL_INTRADAY
+        )
+
+    @patch('stock_tool.get_obb')
+    def test_history_cache_prune(self, mock_get_obb):
+        """测试写入缓存时清理过期文件且不留下临时文件"""
+        mock_obb = MagicMock()
+        mock_get_obb.return_value = mock_obb
+        mock_obb.equity.price.historical.return_value = MockOBBResult([{"date": "2024-01-02", "close": 181.5}])
+
+        stale = stock_tool.CACHE_DIR / "hist_stale.json"
+        stale.write_text("[]", encoding="utf-8")
+        old_time = stale.stat().st_mtime - stock_tool.CACHE_TTL_DAILY - 1
+        os.utime(stale, (old_time, old_time))
+
+        args = argparse.Namespace(
+            symbol="AAPL", provider="yfinance", format="json",
+            start="2024-01-01", end="2024-01-31", interval="1d"
+        )
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        cmd_history(args)
+        sys.stdout = sys.__stdout__
+
+        files = [path.name for path in stock_tool.CACHE_DIR.iterdir()]
+        self.assertNotIn("hist_stale.json", files)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].endswith(".json"))
+
 
 class TestNews(unittest.TestCase):
     """新闻功能测试"""
@@ -153,8 +330,6 @@ class TestNews(unittest.TestCase):
         ]
         mock_obb.news.company.return_value = MockOBBResult(mock_news_data)
 
-        from stock_tool import cmd_news
-        import argparse
         args = argparse.Namespace(
             symbol="AAPL", provider="yfinance", format="json",
             limit=5, start=None, end=None
@@ -169,6 +344,32 @@ class TestNews(unittest.TestCase):
         self.assertEqual(len(output), 2)
         self.assertIn("title", output[0])
 
+    @patch('stock_tool.get_obb')
+    def test_news_multiple_symbols(self, mock_get_obb):
+        """测试多个股票代码时 limit 传给每次请求"""
+        mock_obb = MagicMock()
+        mock_get_obb.return_value = mock_obb
+
+        def company(symbol, provider, limit):
+            return MockOBBResult([{"title": f"{symbol} news {i}", "symbol": symbol} for i in range(limit)])
+        mock_obb.news.company.side_effect = company
+
+        args = argparse.Namespace(
+            symbol="AAPL,MSFT", provider="yfinance", format="json",
+            limit=3, start=None, end=None
+        )
+
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        cmd_news(args)
+        sys.stdout = sys.__stdout__
+
+        output = json.loads(captured_output.getvalue())
+        self.assertEqual(len(output), 6)
+        self.assertEqual(mock_obb.news.company.call_count, 2)
+        for call in mock_obb.news.company.call_args_list:
+            self.assertEqual(call.kwargs["limit"], 3)
+
     @patch('stock_tool.get_obb')
     def test_news_default(self, mock_get_obb):
         """测试默认参数"""
@@ -178,8 +379,6 @@ class TestNews(unittest.TestCase):
         mock_news_data = [{"title": "Test news", "date": "2024-01-15"}]
         mock_obb.news.company.return_value = MockOBBResult(mock_news_data)
 
-        from stock_tool import cmd_news
-        import argparse
         args = argparse.Namespace(
             symbol="AAPL", provider="yfinance", format="json",
             limit=10, start=None, end=None
@@ -194,7 +393,7 @@ class TestNews(unittest.TestCase):
         self.assertIsInstance(output, list)
 
 
-class TestTechnical(unittest.TestCase):
+class TestTechnical(CacheIsolatedTestCase):
     """技术分析测试"""
 
     @patch('stock_tool.get_obb')
@@ -211,8 +410,6 @@ class TestTechnical(unittest.TestCase):
         mock_rsi_data = [{"date": f"2024-01-{i:02d}", "RSI_14": 50 + i} for i in range(20, 31)]
         mock_obb.technical.rsi.return_value = MockOBBResult(mock_rsi_data)
 
-        from stock_tool import cmd_technical
-        import argparse
         args = argparse.Namespace(
             symbol="AAPL", provider="yfinance", format="json",
             indicators="rsi", period=14, start=None
@@ -227,6 +424,10 @@ class TestTechnical(unittest.TestCase):
         self.assertEqual(output["symbol"], "AAPL")
         self.assertIn("rsi", output["indicators"])
 
+        # 未指定开始日期时默认取一年前
+        expected_start = (datetime.now().date() - timedelta(days=365)).isoformat()
+        self.assertEqual(mock_obb.equity.price.historical.call_args.kwargs["start_date"], expected_start)
+
     @patch('stock_tool.get_obb')
     def test_technical_macd(self, mock_get_obb):
         """测试 MACD 指标"""
@@ -244,8 +445,6 @@ class TestTechnical(unittest.TestCase):
         }]
         mock_obb.technical.macd.return_value = MockOBBResult(mock_macd_data)
 
-        from stock_tool import cmd_technical
-        import argparse
         args = argparse.Namespace(
             symbol="AAPL", provider="yfinance", format="json",
             indicators="macd", period=14, start=None
@@ -272,8 +471,6 @@ class TestTechnical(unittest.TestCase):
         mock_obb.technical.macd.return_value = MockOBBResult([{"MACD_12_26_9": 1.5, "MACDs_12_26_9": 1.2, "MACDh_12_26_9": 0.3}])
         mock_obb.technical.sma.return_value = MockOBBResult([{"SMA_14": 182.5}])
 
-        from stock_tool import cmd_technical
-        import argparse
         args = argparse.Namespace(
             symbol="AAPL", provider="yfinance", format="json",
             indicators="rsi,macd,sma", period=14, start=None
@@ -289,14 +486,66 @@ class TestTechnical(unittest.TestCase):
         self.assertIn("macd", output["indicators"])
         self.assertIn("sma", output["indicators"])
 
+    @patch('stock_tool.get_obb')
+    def test_technical_partial_failure(self, mock_get_obb):
+        """测试单个指标失败不影响其他指标"""
+        mock_obb = MagicMock()
+        mock_get_obb.return_value = mock_obb
+
+        mock_history = [{"date": f"2024-01-{i:02d}", "close": 180 + i} for i in range(1, 31)]
+        mock_obb.equity.price.historical.return_value = MockOBBResult(mock_history)
+
+        mock_obb.technical.rsi.return_value = MockOBBResult([{"RSI_14": 55}])
+        mock_obb.technical.macd.side_effect = RuntimeError("macd failed")
+
+        args = argparse.Namespace(
+            symbol="AAPL", provider="yfinance", format="json",
+            indicators="rsi,macd,foo", period=14, start=None
+        )
+
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        cmd_technical(args)
+        sys.stdout = sys.__stdout__
+
+        output = json.loads(captured_output.getvalue())
+        self.assertEqual(list(output["indicators"]), ["rsi", "macd", "foo"])
+        self.assertEqual(output["indicators"]["rsi"]["latest"], 55)
+        self.assertEqual(output["indicators"]["macd"], {"error": "macd failed"})
+        self.assertIn("error", output["indicators"]["foo"])
+
+    @unittest.skipIf(pd is None, "需要 pandas（随 openbb 安装）")
+    @patch('stock_tool.get_obb')
+    def test_technical_recent_data_frame(self, mock_get_obb):
+        """测试 DataFrame 结果的 recent_data 与原先输出一致"""
+        mock_obb = MagicMock()
+        mock_get_obb.return_value = mock_obb
+        mock_obb.equity.price.historical.return_value = MockOBBResult([{"date": "2024-01-01", "close": 180}])
+        rows = [{"date": datetime(2024, 1, 1) + timedelta(days=i), "RSI_14": 40.0 + i} for i in range(30)]
+        rsi_result = MockOBBFrameResult(rows)
+        mock_obb.technical.rsi.return_value = rsi_result
+
+        args = argparse.Namespace(
+            symbol="AAPL", provider="yfinance", format="json",
+            indicators="rsi", period=14, start="2024-01-01"
+        )
+
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        cmd_technical(args)
+        sys.stdout = sys.__stdout__
+
+        output = json.loads(captured_output.getvalue())
+        expected = json.loads(format_output(rsi_result.to_dict(orient="records")[-10:], "json"))
+        self.assertEqual(output["indicators"]["rsi"]["recent_data"], expected)
+        self.assertEqual(output["indicators"]["rsi"]["latest"], 69.0)
+
 
 class TestInterpretations(unittest.TestCase):
     """指标解读测试"""
 
     def test_interpret_rsi(self):
         """测试 RSI 解读"""
-        from stock_tool import interpret_rsi
-
         self.assertIn("超买", interpret_rsi(75))
         self.assertIn("超卖", interpret_rsi(25))
         self.assertIn("多头", interpret_rsi(60))
@@ -305,51 +554,173 @@ class TestInterpretations(unittest.TestCase):
 
     def test_interpret_macd(self):
         """测试 MACD 解读"""
-        from stock_tool import interpret_macd
-
         self.assertIn("金叉", interpret_macd({"macd": 1.5, "signal": 1.0, "histogram": 0.5}))
         self.assertIn("死叉", interpret_macd({"macd": -1.5, "signal": -1.0, "histogram": -0.5}))
         self.assertIn("无法计算", interpret_macd({}))
 
     def test_interpret_adx(self):
         """测试 ADX 解读"""
-        from stock_tool import interpret_adx
-
         self.assertIn("趋势明显", interpret_adx(30))
         self.assertIn("震荡", interpret_adx(20))
         self.assertIn("无法计算", interpret_adx(None))
 
     def test_interpret_stoch(self):
         """测试随机指标解读"""
-        from stock_tool import interpret_stoch
-
         self.assertIn("超买", interpret_stoch({"k": 85, "d": 82}))
         self.assertIn("超卖", interpret_stoch({"k": 15, "d": 18}))
         self.assertIn("无法计算", interpret_stoch({}))
 
+    def test_interpret_nan(self):
+        """测试 NaN（历史数据不足）按无法计算处理"""
+        nan = float("nan")
+        self.assertIn("无法计算", interpret_rsi(nan))
+        self.assertIn("无法计算", interpret_adx(nan))
+        self.assertIn("无法计算", interpret_stoch({"k": nan, "d": nan}))
+        self.assertIn("无法计算", interpret_stoch({"k": 50, "d": nan}))
+        self.assertIn("无法计算", interpret_macd({"macd": nan, "signal": nan, "histogram": nan}))
+        self.assertIn("无法计算", interpret_macd({"macd": 1.5, "signal": nan}))
+        self.assertIn("金叉", interpret_macd({"macd": 1.5, "signal": 1.0, "histogram": nan}))
+
+    def test_interpret_boundaries(self):
+        """测试解读分档边界值"""
+        self.assertIn("超买", interpret_rsi(70))
+        self.assertIn("多头", interpret_rsi(50))
+        self.assertIn("超卖", interpret_rsi(30))
+        self.assertIn("空头", interpret_rsi(30.01))
+        self.assertIn("趋势明显", interpret_adx(25))
+        self.assertIn("超买", interpret_stoch({"k": 80, "d": 80}))
+        self.assertIn("超卖", interpret_stoch({"k": 20, "d": 20}))
+        self.assertIn("偏多", interpret_stoch({"k": 85, "d": 70}))
+        self.assertIn("偏空", interpret_stoch({"k": 15, "d": 25}))
+
+
+class TestIndicatorValue(unittest.TestCase):
+    """指标取值测试"""
+
+    def test_get_indicator_value(self):
+        """测试获取带前缀/后缀的指标值"""
+        latest = {"date": "2024-01-30", "close_RSI_14.0": 55, "close_BBU_14_2.0": 190.0, "close_MACDs_12_26_9": 1.2}
+
+        self.assertEqual(get_indicator_value(latest, "RSI_14"), 55)
+        self.assertEqual(get_indicator_value(latest, "BBU_14"), 190.0)
+        self.assertEqual(get_indicator_value(latest, "MACDs_12_26_9"), 1.2)
+        self.assertIsNone(get_indicator_value(latest, "MACD_12_26_9"))
+
+
+class TestToRecords(unittest.TestCase):
+    """结果转换测试"""
+
+    def test_to_records_fallback(self):
+        """测试没有 to_dict 时按行类型提取"""
+        class Model:
+            def __init__(self, **kwargs):
+                self._data = kwargs
+
+            def model_dump(self):
+                return dict(self._data)
+
+        self.assertEqual(to_records(SimpleNamespace(results=[Model(a=1), Model(a=2)])), [{"a": 1}, {"a": 2}])
+        self.assertEqual(to_records(SimpleNamespace(results=[SimpleNamespace(a=1)])), [{"a": 1}])
+        self.assertEqual(to_records(SimpleNamespace(results=[{"a": 1}])), [{"a": 1}])
+        self.assertEqual(to_records(SimpleNamespace(results=[])), [])
+
+    def test_tail_records(self):
+        """测试只转换最后 n 条"""
+        rows = [{"i": i} for i in range(30)]
+        self.assertEqual(tail_records(MockOBBResult(rows), 10), rows[-10:])
+        self.assertEqual(tail_records(SimpleNamespace(results=rows), 3), rows[-3:])
+        self.assertEqual(tail_records(MockOBBResult({"i": 0}), 10), [{"i": 0}])
+
+    @unittest.skipIf(pd is None, "需要 pandas（随 openbb 安装）")
+    def test_tail_records_frame(self):
+        """测试 DataFrame 结果截取后与 to_dict 再切片一致"""
+        rows = [{"date": datetime(2024, 1, 1) + timedelta(days=i), "RSI_14": 40.0 + i} for i in range(30)]
+        result = MockOBBFrameResult(rows)
+        self.assertEqual(tail_records(result, 10), result.to_dict(orient="records")[-10:])
+
 
 class TestFormatOutput(unittest.TestCase):
     """输出格式测试"""
 
     def test_json_format(self):
         """测试 JSON 格式输出"""
-        from stock_tool import format_output
-
         data = [{"a": 1, "b": 2}]
         output = format_output(data, "json")
         parsed = json.loads(output)
         self.assertEqual(parsed, data)
 
+    def test_emit_json_binary_stream(self):
+        """测试 JSON 写入带字节缓冲区的输出流"""
+        data = {"error": "无数据", "symbol": "AAPL"}
+        for indent in (True, False):
+            raw = io.BytesIO()
+            fp = io.TextIOWrapper(raw, encoding="utf-8")
+            emit_json(data, fp, indent=indent)
+            fp.flush()
+            text = raw.getvalue().decode("utf-8")
+            self.assertTrue(text.endswith("\n"))
+            self.assertEqual(json.loads(text), data)
+        self.assertEqual(len(text.strip().splitlines()), 1)
+
+    def test_json_format_without_orjson(self):
+        """测试未安装 orjson 时回退到标准库 json"""
+        data = [{
+            "name": "苹果", "date": datetime(2024, 1, 2).date(), "time": datetime(2024, 1, 2, 9, 30),
+            "price": 185.5, "rsi": float("nan"), "recent": [float("inf"), 1.0],
+        }]
+        expected = format_output(data, "json")
+        with patch('stock_tool.orjson', None):
+            output = format_output(data, "json")
+            emitted = StringIO()
+            emit_json(data, emitted)
+        self.assertEqual(output, expected)
+        self.assertEqual(emitted.getvalue(), expected + "\n")
+        self.assertEqual(json.loads(output)[0]["rsi"], None)
+        self.assertEqual(json.loads(output)[0]["recent"], [None, 1.0])
+        self.assertIn('"2024-01-02 09:30:00"', output)
+        self.assertIn("苹果", output)
+
     def test_table_format(self):
         """测试表格格式输出"""
-        from stock_tool import format_output
-
         data = [{"name": "AAPL", "price": 185.5}, {"name": "GOOGL", "price": 140.0}]
         output = format_output(data, "table")
         self.assertIn("name", output)
         self.assertIn("price", output)
         self.assertIn("AAPL", output)
 
+    def test_write_output(self):
+        """测试直接写入输出流"""
+        data = [{"name": "AAPL", "price": 185.5}]
+        for fmt in ("json", "table"):
+            fp = StringIO()
+            write_output(data, fmt, fp)
+            self.assertEqual(fp.getvalue(), format_output(data, fmt) + "\n")
+
+
+class TestMain(unittest.TestCase):
+    """命令行入口测试"""
+
+    def test_main_dispatch(self):
+        """测试按需构建子命令并分发"""
+        mock_cmd_quote = MagicMock()
+        with patch.dict('stock_tool.DISPATCH', {"quote": mock_cmd_quote}):
+            main(["-f", "table", "quote", "AAPL"])
+
+        args = mock_cmd_quote.call_args[0][0]
+        self.assertEqual(args.symbol, "AAPL")
+        self.assertEqual(args.format, "table")
+
+    def test_main_no_command(self):
+        """测试未指定子命令"""
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        with self.assertRaises(SystemExit) as context:
+            main([])
+        sys.stdout = sys.__stdout__
+
+        self.assertEqual(context.exception.code, 1)
+        self.assertIn("technical", captured_output.getvalue())
+
 
 if __name__ == "__main__":
     unittest.main()